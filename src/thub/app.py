@@ -2,6 +2,7 @@
 FastAPI application for Tufts Hub.
 """
 
+import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -32,7 +33,7 @@ from thub.logging import (
     log_shutdown,
     log_startup,
 )
-from thub.proxy import proxy_request
+from thub.proxy import close_client, proxy_request
 from thub.websocket import broadcast, connect, disconnect
 
 
@@ -82,6 +83,7 @@ async def lifespan(app: FastAPI):
     configure_logging()
     log_startup()
     yield
+    await close_client()
     log_shutdown()
 
 
@@ -272,6 +274,10 @@ async def websocket_channel(websocket: WebSocket, channel_name: str):
         await websocket.close(code=1008)
         return
 
+    # Intern the name so every connection to this channel shares one key
+    # object, and channel lookups while broadcasting match on identity.
+    channel_name = sys.intern(channel_name)
+
     # Connect to channel.
     await connect(websocket, channel_name, username)
 
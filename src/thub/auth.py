@@ -5,6 +5,7 @@ Authentication for Tufts Hub using JWT tokens and session cookies.
 import hashlib
 import hmac
 import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
@@ -17,6 +18,13 @@ from thub.config import load_config, save_config
 
 security = HTTPBearer(auto_error=False)
 
+# Maximum number of verified tokens to remember.
+TOKEN_CACHE_SIZE = 4096
+
+# Verified tokens, so repeat requests with the same session skip the HMAC
+# check. Structure: {(token, secret): (username, expiry_timestamp)}
+_verified_tokens: dict[tuple[str, str], tuple[str, int]] = {}
+
 
 def ensure_jwt_secret(config: dict[str, Any]) -> str:
     """
@@ -78,18 +86,38 @@ def verify_jwt_token(token: str, config: dict[str, Any]) -> Optional[str]:
     """
     Verify a JWT token and return the username.
 
+    Successfully verified tokens are cached until they expire, so only the
+    first request with a given token pays for signature verification.
+
     Returns None if token is invalid or expired.
     """
     secret = ensure_jwt_secret(config)
+    cache_key = (token, secret)
+
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        username, expiry = cached
+        if expiry > time.time():
+            return username
+        # Token has expired since it was cached.
+        _verified_tokens.pop(cache_key, None)
+        return None
 
     try:
         payload = jwt.decode(token, secret, algorithms=["HS256"])
-        return payload["sub"]
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    if "exp" in payload:
+        if len(_verified_tokens) >= TOKEN_CACHE_SIZE:
+            # Evict the oldest entry.
+            _verified_tokens.pop(next(iter(_verified_tokens)))
+        _verified_tokens[cache_key] = (payload["sub"], payload["exp"])
+
+    return payload["sub"]
+
 
 async def get_current_user(
     request: Request,
@@ -15,6 +15,16 @@ from thub.config import load_config, save_config
 
 console = Console()
 
+# Path to static assets directory.
+STATIC_DIR = Path(__file__).parent / "static_assets"
+
+# Skeleton project templates, read once at import time. Placeholders are
+# filled with bytes.replace, so no template engine is involved.
+_INDEX_HTML_ONLINE = (STATIC_DIR / "skeleton_index.html").read_bytes()
+_INDEX_HTML_OFFLINE = (STATIC_DIR / "skeleton_index_offline.html").read_bytes()
+_STYLE_CSS = (STATIC_DIR / "skeleton_style.css").read_bytes()
+_GITIGNORE = (STATIC_DIR / "skeleton_gitignore").read_bytes()
+
 
 def hash_password(password: str) -> tuple[str, str]:
     """
@@ -96,9 +106,6 @@ def new(args: argparse.Namespace):
         get_latest_cached_version,
     )
 
-    # Path to static assets directory.
-    static_dir = Path(__file__).parent / "static_assets"
-
     # Determine PyScript version.
     if args.version:
         version = args.version
@@ -179,41 +186,32 @@ def new(args: argparse.Namespace):
 
     # Create main.py.
     main_py = project_path / "main.py"
-    main_py.write_text('print("Hello, World!")\n', encoding="utf-8")
+    main_py.write_bytes(b'print("Hello, World!")\n')
 
     # Create settings.json.
     settings_json = project_path / "settings.json"
-    settings_json.write_text("{}\n", encoding="utf-8")
+    settings_json.write_bytes(b"{}\n")
 
     # Create index.html from appropriate template.
     index_html = project_path / "index.html"
     if args.offline:
-        template = (static_dir / "skeleton_index_offline.html").read_text(
-            encoding="utf-8"
-        )
-        html_content = template.format(project_name=args.project_name)
+        html_content = _INDEX_HTML_OFFLINE
     else:
-        template = (static_dir / "skeleton_index.html").read_text(
-            encoding="utf-8"
+        html_content = _INDEX_HTML_ONLINE.replace(
+            b"{version}", version.encode("utf-8")
         )
-        html_content = template.format(
-            project_name=args.project_name, version=version
-        )
-    index_html.write_text(html_content, encoding="utf-8")
+    html_content = html_content.replace(
+        b"{project_name}", args.project_name.encode("utf-8")
+    )
+    index_html.write_bytes(html_content)
 
     # Create style.css from template.
     style_css = project_path / "style.css"
-    css_content = (static_dir / "skeleton_style.css").read_text(
-        encoding="utf-8"
-    )
-    style_css.write_text(css_content, encoding="utf-8")
+    style_css.write_bytes(_STYLE_CSS)
 
     # Create .gitignore from template.
     gitignore = project_path / ".gitignore"
-    gitignore_content = (static_dir / "skeleton_gitignore").read_text(
-        encoding="utf-8"
-    )
-    gitignore.write_text(gitignore_content, encoding="utf-8")
+    gitignore.write_bytes(_GITIGNORE)
 
     console.print(
         f"[green]Created PyScript project '{args.project_name}' "
@@ -23,8 +23,7 @@ def load_config(path: Path = Path("config.json")) -> dict[str, Any]:
             },
         }
 
-    with open(path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    config = json.loads(path.read_bytes())
 
     # Ensure required keys exist.
     if "users" not in config:
@@ -41,5 +40,5 @@ def save_config(config: dict[str, Any], path: Path = Path("config.json")):
     """
     Save configuration to JSON file with pretty formatting.
     """
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    payload = json.dumps(config, indent=2, ensure_ascii=False)
+    path.write_bytes(payload.encode("utf-8"))
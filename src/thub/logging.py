@@ -3,24 +3,46 @@ Structured logging configuration for Tufts Hub.
 """
 
 import logging
+import os
+import re
 import sys
-import uuid
+import time
 from typing import Any
 
+import orjson
 import structlog
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
 
 # Sensitive keys that should be obfuscated in logs.
-SENSITIVE_KEYS = {
-    "password",
-    "api_key",
-    "authorization",
-    "token",
-    "secret",
-    "key",
-}
+SENSITIVE_KEYS = frozenset(
+    {
+        "password",
+        "api_key",
+        "authorization",
+        "token",
+        "secret",
+        "key",
+    }
+)
+
+# Terms that contain another term (e.g. "api_key" contains "key") can never
+# change whether a key matches, so the pattern only needs the rest.
+_SENSITIVE_TERMS = sorted(
+    term
+    for term in SENSITIVE_KEYS
+    if not any(other != term and other in term for other in SENSITIVE_KEYS)
+)
+
+# Single case-insensitive pattern matching any sensitive key as a substring.
+_SENSITIVE_RE = re.compile(
+    "|".join(re.escape(term) for term in _SENSITIVE_TERMS), re.IGNORECASE
+)
+
+# Loggers pre-bound to an API name for proxy events, so the hot proxy path
+# reuses one bound logger per API. Cleared whenever logging is configured.
+_proxy_loggers: dict[str, Any] = {}
 
 
 def obfuscate_sensitive(
@@ -31,18 +53,33 @@ def obfuscate_sensitive(
 
     Replaces values for keys matching sensitive patterns with '***'.
     """
-    for key in list(event_dict.keys()):
-        if any(sensitive in key.lower() for sensitive in SENSITIVE_KEYS):
+    # Most events have nothing to redact: check every key in a single scan
+    # (no sensitive term contains a newline, so matches can't span keys).
+    if not _SENSITIVE_RE.search("\n".join(event_dict)):
+        return event_dict
+
+    for key in event_dict:
+        if key in SENSITIVE_KEYS or _SENSITIVE_RE.search(key):
             event_dict[key] = "***"
     return event_dict
 
 
+def _dumps(obj: Any, **kwargs: Any) -> str:
+    """
+    Serialize a log event to JSON with orjson.
+
+    orjson returns bytes, so decode for the text-based stdout logger.
+    """
+    return orjson.dumps(obj, **kwargs).decode("utf-8")
+
+
 def configure_logging():
     """
     Configure structlog for JSON output to stdout.
 
     Sets up processors for timestamps, obfuscation, and formatting.
     """
+    _proxy_loggers.clear()
     structlog.configure(
         processors=[
             structlog.contextvars.merge_contextvars,
@@ -51,11 +88,13 @@ def configure_logging():
             obfuscate_sensitive,
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_dumps),
         ],
         wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(file=sys.stdout),
+        # Writes each line with a single write() and flush, skipping the
+        # overhead of print().
+        logger_factory=structlog.WriteLoggerFactory(file=sys.stdout),
         cache_logger_on_first_use=True,
     )
 
@@ -69,38 +108,41 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         """
         Log request details, process request, and log response.
         """
-        request_id = str(uuid.uuid4())
+        # Short random ID to correlate the log lines for one request.
+        request_id = os.urandom(8).hex()
         log = structlog.get_logger()
 
-        # Log incoming request.
-        log.info(
-            "http_request",
+        # Bind request context once; merge_contextvars adds it to every log
+        # line emitted while handling this request, including in endpoints.
+        with structlog.contextvars.bound_contextvars(
             request_id=request_id,
             method=request.method,
             path=request.url.path,
-            client=request.client.host if request.client else None,
-        )
-
-        # Process request and capture response.
-        try:
-            response = await call_next(request)
-
-            # Log response.
+        ):
+            # Log incoming request.
             log.info(
-                "http_response",
-                request_id=request_id,
-                status_code=response.status_code,
+                "http_request",
+                client=request.client.host if request.client else None,
             )
 
-            return response
-        except Exception as exc:
-            # Log exception with full context.
-            log.error(
-                "http_exception",
-                request_id=request_id,
-                exc_info=exc,
-            )
-            raise
+            # Process request and capture response, timing it with the
+            # monotonic clock as an integer number of nanoseconds.
+            start = time.perf_counter_ns()
+            try:
+                response = await call_next(request)
+
+                # Log response.
+                log.info(
+                    "http_response",
+                    status_code=response.status_code,
+                    duration_ns=time.perf_counter_ns() - start,
+                )
+
+                return response
+            except Exception as exc:
+                # Log exception with full context.
+                log.error("http_exception", exc_info=exc)
+                raise
 
 
 def log_auth_success(username: str):
@@ -127,14 +169,24 @@ def log_websocket_disconnect(channel: str, username: str):
     log.info("websocket_disconnect", channel=channel, username=username)
 
 
+def _get_proxy_logger(api_name: str) -> Any:
+    """
+    Get the cached logger bound to the given API name.
+    """
+    log = _proxy_loggers.get(api_name)
+    if log is None:
+        log = structlog.get_logger().bind(api_name=api_name)
+        _proxy_loggers[api_name] = log
+    return log
+
+
 def log_proxy_request(api_name: str, path: str, method: str, username: str):
     """
     Log proxy request to external API.
     """
-    log = structlog.get_logger()
+    log = _get_proxy_logger(api_name)
     log.info(
         "proxy_request",
-        api_name=api_name,
         path=path,
         method=method,
         username=username,
@@ -145,8 +197,8 @@ def log_proxy_response(api_name: str, status_code: int):
     """
     Log proxy response from external API.
     """
-    log = structlog.get_logger()
-    log.info("proxy_response", api_name=api_name, status_code=status_code)
+    log = _get_proxy_logger(api_name)
+    log.info("proxy_response", status_code=status_code)
 
 
 def log_startup():
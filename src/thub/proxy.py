@@ -2,24 +2,89 @@
 API proxy functionality for Tufts Hub.
 """
 
+from functools import lru_cache
+from typing import Optional
+
 import httpx
 from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from thub.config import load_config
 from thub.logging import log_proxy_request, log_proxy_response
 
 
-# Headers to strip from proxied responses for security.
-SENSITIVE_RESPONSE_HEADERS = {
-    "set-cookie",
-    "authorization",
-    "www-authenticate",
-    "proxy-authenticate",
-    "proxy-authorization",
-    "content-length",  # Let FastAPI recalculate this.
-    "transfer-encoding",  # Let FastAPI handle encoding.
-    "content-encoding",  # Let FastAPI handle compression.
-}
+# Headers to strip from proxied responses for security and correctness.
+SENSITIVE_RESPONSE_HEADERS = frozenset(
+    {
+        "set-cookie",
+        "authorization",
+        "www-authenticate",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "content-length",  # Let FastAPI recalculate this.
+        "transfer-encoding",  # Let FastAPI handle encoding.
+        "content-encoding",  # Let FastAPI handle compression.
+        # Hop-by-hop headers only apply to the upstream connection.
+        "connection",
+        "keep-alive",
+        "te",
+        "trailers",
+        "upgrade",
+    }
+)
+
+# Shared HTTP client so upstream connections are pooled across requests.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client used for proxied requests.
+
+    Created on first use, so keep-alive connections (and their TCP/TLS
+    setup) are reused across calls rather than rebuilt per request.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_keepalive_connections=100, max_connections=200
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """
+    Close the shared HTTP client and release its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@lru_cache(maxsize=128)
+def get_base_prefix(base_url: str) -> str:
+    """
+    Normalise a configured base URL into a prefix ending in a single slash.
+
+    Cached per base URL, so building a proxied URL is a plain concatenation.
+    """
+    return base_url.rstrip("/") + "/"
+
+
+@lru_cache(maxsize=128)
+def get_stripped_headers(extra: tuple[str, ...] = ()) -> frozenset[str]:
+    """
+    Get the response header names to strip for a proxied API.
+
+    Combines the defaults with any extra names from the API's optional
+    strip_response_headers setting. Cached per distinct setting, so the set
+    is built once rather than on every request.
+    """
+    return SENSITIVE_RESPONSE_HEADERS | {name.lower() for name in extra}
 
 
 async def proxy_request(
@@ -32,71 +97,82 @@ async def proxy_request(
     """
     Proxy a request to a configured external API.
 
-    Returns the proxied response with sensitive headers removed.
+    Returns the proxied response, streamed from upstream, with sensitive
+    headers removed.
     """
     config = load_config()
 
-    # Check if API is configured.
-    if api_name not in config.get("proxies", {}):
+    # Check if API is configured, before doing any request or upstream work.
+    api_config = config.get("proxies", {}).get(api_name)
+    if api_config is None:
         return Response(
             content=f"API '{api_name}' not configured",
             status_code=404,
         )
 
-    api_config = config["proxies"][api_name]
-    base_url = api_config.get("base_url", "").rstrip("/")
     configured_headers = api_config.get("headers", {})
 
     # Build full URL.
-    full_path = path.lstrip("/")
-    url = f"{base_url}/{full_path}"
+    url = get_base_prefix(api_config.get("base_url", "")) + path.lstrip("/")
 
     # Get query parameters from original request.
     query_params = dict(request.query_params)
 
-    # Get request body if present.
-    body = await request.body()
-
-    # Prepare headers (use configured headers).
-    headers = dict(configured_headers)
+    # Stream the request body through if the client sent one, rather than
+    # buffering it. Keeping its Content-Length stops httpx from switching
+    # the upstream request to chunked transfer encoding.
+    headers = configured_headers
+    content = None
+    content_length = request.headers.get("content-length")
+    if content_length not in (None, "0"):
+        content = request.stream()
+        headers = {**configured_headers, "Content-Length": content_length}
+    elif "transfer-encoding" in request.headers:
+        content = request.stream()
 
     # Log the proxy request.
     log_proxy_request(api_name, path, method, username)
 
-    # Make the proxied request.
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method=method,
-                url=url,
-                params=query_params,
-                content=body if body else None,
-                headers=headers,
-                follow_redirects=False,
-            )
-
-            # Log the proxy response.
-            log_proxy_response(api_name, response.status_code)
-
-            # Prepare response headers (strip sensitive ones).
-            response_headers = {
-                key: value
-                for key, value in response.headers.items()
-                if key.lower() not in SENSITIVE_RESPONSE_HEADERS
-            }
-
-            # Return proxied response.
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=response_headers,
-                media_type=response.headers.get(
-                    "content-type", "application/octet-stream"
-                ),
-            )
-
-        except httpx.RequestError as e:
-            return Response(
-                content=f"Proxy request failed: {str(e)}",
-                status_code=502,
-            )
+    # Make the proxied request, streaming the upstream response body.
+    client = get_client()
+    try:
+        upstream_request = client.build_request(
+            method=method,
+            url=url,
+            params=query_params,
+            content=content,
+            headers=headers,
+        )
+        response = await client.send(
+            upstream_request, stream=True, follow_redirects=False
+        )
+    except httpx.RequestError as e:
+        return Response(
+            content=f"Proxy request failed: {str(e)}",
+            status_code=502,
+        )
+
+    # Log the proxy response.
+    log_proxy_response(api_name, response.status_code)
+
+    # Prepare response headers (strip sensitive ones).
+    stripped_headers = get_stripped_headers(
+        tuple(api_config.get("strip_response_headers", ()))
+    )
+    response_headers = {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in stripped_headers
+    }
+
+    # Pipe the (decoded) body through as it arrives, closing the upstream
+    # response once it has been sent.
+    return StreamingResponse(
+        response.aiter_bytes(),
+        status_code=response.status_code,
+        headers=response_headers,
+        media_type=response.headers.get(
+            "content-type", "application/octet-stream"
+        ),
+        background=BackgroundTask(response.aclose),
+    )
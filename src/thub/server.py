@@ -117,6 +117,10 @@ def start_server(
             ssl_certfile=ssl_certfile,
             log_config=log_config,
             access_log=False,
+            # Broadcasts send the same message to every client in a channel,
+            # so per-message compression would redo the same work (and hold
+            # a compressor per connection) for no shared benefit.
+            ws_per_message_deflate=False,
         )
 
         return None
@@ -133,6 +137,8 @@ def start_server(
             host,
             "--port",
             str(port),
+            "--ws-per-message-deflate",
+            "false",
         ]
 
         if reload:
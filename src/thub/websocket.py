@@ -2,7 +2,8 @@
 WebSocket channel management for Tufts Hub.
 """
 
-from typing import Dict, Set
+import asyncio
+from typing import Dict
 
 from fastapi import WebSocket
 
@@ -10,8 +11,13 @@ from thub.logging import log_websocket_connect, log_websocket_disconnect
 
 
 # Store active connections per channel.
-# Structure: {channel_name: {(websocket, username), ...}}
-channels: Dict[str, Set[tuple[WebSocket, str]]] = {}
+# Structure: {channel_name: ((websocket, username), ...)}
+# Members are immutable tuples that are replaced, never mutated, so a
+# broadcast can iterate the tuple it looked up while connections come and go.
+channels: Dict[str, tuple[tuple[WebSocket, str], ...]] = {}
+
+# Maximum number of sends a broadcast has in flight at once.
+BROADCAST_BATCH_SIZE = 50
 
 
 async def connect(websocket: WebSocket, channel: str, username: str):
@@ -20,10 +26,7 @@ async def connect(websocket: WebSocket, channel: str, username: str):
     """
     await websocket.accept()
 
-    if channel not in channels:
-        channels[channel] = set()
-
-    channels[channel].add((websocket, username))
+    channels[channel] = channels.get(channel, ()) + ((websocket, username),)
     log_websocket_connect(channel, username)
 
 
@@ -32,10 +35,16 @@ def disconnect(websocket: WebSocket, channel: str, username: str):
     Remove a WebSocket connection from a channel.
     """
     if channel in channels:
-        channels[channel].discard((websocket, username))
+        members = tuple(
+            member
+            for member in channels[channel]
+            if member != (websocket, username)
+        )
 
         # Clean up empty channels.
-        if not channels[channel]:
+        if members:
+            channels[channel] = members
+        else:
             del channels[channel]
 
     log_websocket_disconnect(channel, username)
@@ -45,19 +54,28 @@ async def broadcast(message: str, channel: str, sender_websocket: WebSocket):
     """
     Broadcast a message to all connections in a channel except sender.
     """
-    if channel not in channels:
-        return
-
-    # Send to all connections except the sender.
-    for websocket, username in channels[channel]:
-        if websocket != sender_websocket:
-            await websocket.send_text(message)
+    recipients = [
+        websocket
+        for websocket, username in channels.get(channel, ())
+        if websocket != sender_websocket
+    ]
+
+    # Send to all connections except the sender, concurrently, so a slow or
+    # closed connection neither delays nor stops delivery to the others.
+    # Large channels are sent to in batches, yielding to the event loop in
+    # between so other requests are not starved during a big fan-out.
+    for start in range(0, len(recipients), BROADCAST_BATCH_SIZE):
+        if start:
+            await asyncio.sleep(0)
+        batch = recipients[start : start + BROADCAST_BATCH_SIZE]
+        await asyncio.gather(
+            *(websocket.send_text(message) for websocket in batch),
+            return_exceptions=True,
+        )
 
 
 def get_connection_count(channel: str) -> int:
     """
     Get the number of active connections in a channel.
     """
-    if channel not in channels:
-        return 0
-    return len(channels[channel])
+    return len(channels.get(channel, ()))
@@ -0,0 +1,54 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+from functools import lru_cache
+
+import pytest
+from fastapi.testclient import TestClient
+
+from thub.auth import create_jwt_token
+
+
+@lru_cache(maxsize=32)
+def _cached_token(username: str, secret: str, expiry_hours: int) -> str:
+    """
+    Sign a session token, once per user and JWT settings.
+    """
+    config = {"jwt": {"secret": secret, "expiry_hours": expiry_hours}}
+    return create_jwt_token(username, config)
+
+
+@pytest.fixture(scope="session")
+def session_client():
+    """
+    A TestClient for the app, started once for the whole test session.
+    """
+    from thub.app import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(session_client):
+    """
+    The shared TestClient, with no cookies left over from earlier tests.
+    """
+    session_client.cookies.clear()
+    return session_client
+
+
+@pytest.fixture(scope="session")
+def make_token():
+    """
+    Return session tokens for a user and config, signing each one only once.
+    """
+
+    def make(username, config):
+        jwt_config = config["jwt"]
+        return _cached_token(
+            username, jwt_config["secret"], jwt_config["expiry_hours"]
+        )
+
+    return make
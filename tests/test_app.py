@@ -4,12 +4,8 @@ Tests for app middleware and headers.
 
 import json
 
-from fastapi.testclient import TestClient
 
-from thub.app import app
-
-
-def test_cors_headers_present(tmp_path, monkeypatch):
+def test_cors_headers_present(tmp_path, monkeypatch, client):
     """
     CORS headers are present in responses when Origin header is sent.
     """
@@ -25,8 +21,6 @@ def test_cors_headers_present(tmp_path, monkeypatch):
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config, f)
 
-    client = TestClient(app)
-
     response = client.get("/login", headers={"Origin": "http://localhost"})
 
     # Check CORS headers.
@@ -38,7 +32,7 @@ def test_cors_headers_present(tmp_path, monkeypatch):
     ]
 
 
-def test_coi_headers_present(tmp_path, monkeypatch):
+def test_coi_headers_present(tmp_path, monkeypatch, client):
     """
     Cross-Origin Isolation headers are present in responses.
     """
@@ -54,8 +48,6 @@ def test_coi_headers_present(tmp_path, monkeypatch):
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config, f)
 
-    client = TestClient(app)
-
     response = client.get("/login")
 
     # Check COI headers.
@@ -69,7 +61,9 @@ def test_coi_headers_present(tmp_path, monkeypatch):
     assert response.headers["cross-origin-resource-policy"] == "cross-origin"
 
 
-def test_cors_and_coi_headers_on_static_files(tmp_path, monkeypatch):
+def test_cors_and_coi_headers_on_static_files(
+    tmp_path, monkeypatch, client, make_token
+):
     """
     CORS and COI headers are present on static file responses.
     """
@@ -95,11 +89,8 @@ def test_cors_and_coi_headers_on_static_files(tmp_path, monkeypatch):
     test_file.write_text("<h1>Hello World</h1>", encoding="utf-8")
 
     # Create a valid JWT token.
-    from thub.auth import create_jwt_token
-
-    token = create_jwt_token("testuser", config)
+    token = make_token("testuser", config)
 
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get(
@@ -5,15 +5,12 @@ Tests for authentication.
 import hashlib
 import json
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import jwt
 import pytest
 from fastapi import HTTPException
-from fastapi.testclient import TestClient
 
-from thub.app import app
 from thub.auth import (
     create_jwt_token,
     ensure_jwt_secret,
@@ -212,6 +209,52 @@ def test_verify_jwt_token_fails_with_expired_token(tmp_path, monkeypatch):
     assert username is None
 
 
+def test_verify_jwt_token_caches_verified_token(tmp_path, monkeypatch):
+    """
+    Repeat verification of the same token skips signature checking.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("thub.auth._verified_tokens", {})
+
+    config = {
+        "users": {},
+        "proxies": {},
+        "jwt": {"secret": "test_secret", "expiry_hours": 24},
+    }
+
+    token = create_jwt_token("alice", config)
+
+    with patch("thub.auth.jwt.decode", wraps=jwt.decode) as mock_decode:
+        assert verify_jwt_token(token, config) == "alice"
+        assert verify_jwt_token(token, config) == "alice"
+
+    mock_decode.assert_called_once()
+
+
+def test_verify_jwt_token_fails_when_cached_token_expires(
+    tmp_path, monkeypatch
+):
+    """
+    A cached token is rejected once its expiry time has passed.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("thub.auth._verified_tokens", {})
+
+    config = {
+        "users": {},
+        "proxies": {},
+        "jwt": {"secret": "test_secret", "expiry_hours": 1},
+    }
+
+    token = create_jwt_token("bob", config)
+    assert verify_jwt_token(token, config) == "bob"
+
+    # Two hours later the cached entry has expired.
+    later = datetime.now(timezone.utc) + timedelta(hours=2)
+    with patch("thub.auth.time.time", return_value=later.timestamp()):
+        assert verify_jwt_token(token, config) is None
+
+
 def test_verify_jwt_token_fails_with_invalid_signature(tmp_path, monkeypatch):
     """
     JWT token verification fails with wrong signature.
@@ -410,7 +453,7 @@ async def test_get_current_user_redirects_with_invalid_token(
     assert exc_info.value.headers["Location"] == "/login?next=/secure/page"
 
 
-def test_logout_clears_cookie_and_redirects(tmp_path, monkeypatch):
+def test_logout_clears_cookie_and_redirects(tmp_path, monkeypatch, client):
     """
     Logout endpoint clears session cookie and redirects to login.
     """
@@ -426,8 +469,6 @@ def test_logout_clears_cookie_and_redirects(tmp_path, monkeypatch):
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config, f)
 
-    client = TestClient(app)
-
     response = client.get("/logout", follow_redirects=False)
 
     assert response.status_code == 303
@@ -2,9 +2,7 @@
 Tests for cache management.
 """
 
-import shutil
 import zipfile
-from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import httpx
@@ -4,11 +4,8 @@ Tests for command line interface.
 
 import hashlib
 import json
-from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-import pytest
-
 from thub.cli import hash_password, adduser, deluser, new
 
 
@@ -3,9 +3,6 @@ Tests for configuration management.
 """
 
 import json
-from pathlib import Path
-
-import pytest
 
 from thub.config import load_config, save_config
 
@@ -4,16 +4,17 @@ Tests for structured logging.
 
 import json
 from io import StringIO
-from unittest.mock import AsyncMock, MagicMock, patch
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 import structlog
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI
 from starlette.testclient import TestClient
 
 from thub.logging import (
     LoggingMiddleware,
+    _proxy_loggers,
     configure_logging,
     log_auth_success,
     log_config_loaded,
@@ -27,6 +28,30 @@ from thub.logging import (
 )
 
 
+@pytest.fixture(scope="module")
+def log_stream():
+    """
+    Configure logging once for the module, writing to an in-memory stream.
+
+    The logger factory binds sys.stdout when logging is configured, so it is
+    patched only for that call.
+    """
+    stream = StringIO()
+    with patch("sys.stdout", stream):
+        configure_logging()
+    return stream
+
+
+@pytest.fixture
+def log_output(log_stream):
+    """
+    Provide the log stream, emptied of output from earlier tests.
+    """
+    log_stream.seek(0)
+    log_stream.truncate()
+    return log_stream
+
+
 def test_obfuscate_sensitive_redacts_password():
     """
     Obfuscation processor redacts password fields.
@@ -81,6 +106,17 @@ def test_obfuscate_sensitive_redacts_case_insensitive():
     assert result["Password"] == "***"
 
 
+def test_obfuscate_sensitive_redacts_partial_key_matches():
+    """
+    Obfuscation processor redacts keys containing a sensitive substring.
+    """
+    event_dict = {"old_password": "pass456", "X-Refresh-Token": "abc"}
+    result = obfuscate_sensitive(None, None, event_dict)
+
+    assert result["old_password"] == "***"
+    assert result["X-Refresh-Token"] == "***"
+
+
 def test_obfuscate_sensitive_preserves_non_sensitive_data():
     """
     Obfuscation processor preserves non-sensitive fields.
@@ -93,30 +129,39 @@ def test_obfuscate_sensitive_preserves_non_sensitive_data():
     result = obfuscate_sensitive(None, None, event_dict)
 
     assert result == event_dict
+    assert result is event_dict
+
+
+def test_obfuscate_sensitive_does_not_match_across_keys():
+    """
+    Adjacent key names never combine into a sensitive term.
+    """
+    event_dict = {"pass": "a", "word": "b", "to": "c", "ken": "d"}
+    result = obfuscate_sensitive(None, None, event_dict)
 
+    assert result == {"pass": "a", "word": "b", "to": "c", "ken": "d"}
 
-def test_configure_logging_sets_up_structlog():
+
+def test_configure_logging_sets_up_structlog(log_output):
     """
     Configuration sets up structlog with correct processors.
     """
-    configure_logging()
+    assert structlog.is_configured()
 
     # Get a logger and verify it works.
     log = structlog.get_logger()
     assert log is not None
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_logging_produces_json_output(mock_stdout):
+def test_logging_produces_json_output(log_output):
     """
     Configured logging produces JSON formatted output.
     """
-    configure_logging()
     log = structlog.get_logger()
 
     log.info("test_event", data="value")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "test_event"
@@ -125,17 +170,28 @@ def test_logging_produces_json_output(mock_stdout):
     assert log_entry["level"] == "info"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_logging_obfuscates_sensitive_data(mock_stdout):
+def test_logging_serializes_non_json_values(log_output):
+    """
+    Values without a JSON representation are rendered rather than raising.
+    """
+    log = structlog.get_logger()
+
+    log.info("test_event", where=Path("/tmp/project"))
+
+    log_entry = json.loads(log_output.getvalue().strip())
+
+    assert "/tmp/project" in log_entry["where"]
+
+
+def test_logging_obfuscates_sensitive_data(log_output):
     """
     Configured logging automatically obfuscates sensitive data.
     """
-    configure_logging()
     log = structlog.get_logger()
 
     log.info("login", username="alice", password="secret")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["username"] == "alice"
@@ -143,7 +199,7 @@ def test_logging_obfuscates_sensitive_data(mock_stdout):
 
 
 @pytest.mark.asyncio
-async def test_logging_middleware_logs_request():
+async def test_logging_middleware_logs_request(log_output):
     """
     Middleware logs incoming HTTP requests.
     """
@@ -154,28 +210,26 @@ async def test_logging_middleware_logs_request():
     async def test_endpoint():
         return {"message": "ok"}
 
-    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
-        configure_logging()
-        client = TestClient(app)
-        response = client.get("/test")
+    client = TestClient(app)
+    response = client.get("/test")
 
-        assert response.status_code == 200
+    assert response.status_code == 200
 
-        output = mock_stdout.getvalue()
-        lines = [line for line in output.strip().split("\n") if line]
+    output = log_output.getvalue()
+    lines = [line for line in output.strip().split("\n") if line]
 
-        # Should have request and response logs.
-        assert len(lines) >= 2
+    # Should have request and response logs.
+    assert len(lines) >= 2
 
-        request_log = json.loads(lines[0])
-        assert request_log["event"] == "http_request"
-        assert request_log["method"] == "GET"
-        assert request_log["path"] == "/test"
-        assert "request_id" in request_log
+    request_log = json.loads(lines[0])
+    assert request_log["event"] == "http_request"
+    assert request_log["method"] == "GET"
+    assert request_log["path"] == "/test"
+    assert "request_id" in request_log
 
 
 @pytest.mark.asyncio
-async def test_logging_middleware_logs_response():
+async def test_logging_middleware_logs_response(log_output):
     """
     Middleware logs HTTP responses.
     """
@@ -186,24 +240,81 @@ async def test_logging_middleware_logs_response():
     async def test_endpoint():
         return {"message": "ok"}
 
-    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
-        configure_logging()
-        client = TestClient(app)
-        response = client.get("/test")
+    client = TestClient(app)
+    response = client.get("/test")
+
+    assert response.status_code == 200
+
+    output = log_output.getvalue()
+    lines = [line for line in output.strip().split("\n") if line]
+
+    response_log = json.loads(lines[-1])
+    assert response_log["event"] == "http_response"
+    assert response_log["status_code"] == 200
+    assert "request_id" in response_log
+    assert isinstance(response_log["duration_ns"], int)
+    assert response_log["duration_ns"] >= 0
+
 
-        assert response.status_code == 200
+@pytest.mark.asyncio
+async def test_logging_middleware_correlates_request_and_response(
+    log_output,
+):
+    """
+    Request and response logs share the same short hex request ID.
+    """
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/test")
+    async def test_endpoint():
+        return {"message": "ok"}
+
+    client = TestClient(app)
+    client.get("/test")
+
+    output = log_output.getvalue()
+    lines = [line for line in output.strip().split("\n") if line]
+
+    request_log = json.loads(lines[0])
+    response_log = json.loads(lines[-1])
+    assert request_log["request_id"] == response_log["request_id"]
+    assert len(request_log["request_id"]) == 16
+    int(request_log["request_id"], 16)
+
+
+@pytest.mark.asyncio
+async def test_logging_middleware_binds_request_id_for_endpoint_logs(
+    log_output,
+):
+    """
+    Logs emitted while handling a request carry its request ID.
+    """
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/test")
+    async def test_endpoint():
+        log_auth_success("alice")
+        return {"message": "ok"}
 
-        output = mock_stdout.getvalue()
-        lines = [line for line in output.strip().split("\n") if line]
+    client = TestClient(app)
+    client.get("/test")
 
-        response_log = json.loads(lines[-1])
-        assert response_log["event"] == "http_response"
-        assert response_log["status_code"] == 200
-        assert "request_id" in response_log
+    output = log_output.getvalue()
+    lines = [json.loads(line) for line in output.strip().split("\n") if line]
+
+    request_log, endpoint_log = lines[0], lines[1]
+    assert endpoint_log["event"] == "authentication_success"
+    assert endpoint_log["request_id"] == request_log["request_id"]
+    assert endpoint_log["path"] == "/test"
+
+    # Request context does not leak outside the request.
+    assert structlog.contextvars.get_contextvars() == {}
 
 
 @pytest.mark.asyncio
-async def test_logging_middleware_logs_exceptions():
+async def test_logging_middleware_logs_exceptions(log_output):
     """
     Middleware logs exceptions with full context.
     """
@@ -214,47 +325,41 @@ async def test_logging_middleware_logs_exceptions():
     async def error_endpoint():
         raise ValueError("Test error")
 
-    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
-        configure_logging()
-        client = TestClient(app)
+    client = TestClient(app)
 
-        with pytest.raises(ValueError):
-            client.get("/error")
+    with pytest.raises(ValueError):
+        client.get("/error")
 
-        output = mock_stdout.getvalue()
-        lines = [line for line in output.strip().split("\n") if line]
+    output = log_output.getvalue()
+    lines = [line for line in output.strip().split("\n") if line]
 
-        # Last line should be the exception log.
-        error_log = json.loads(lines[-1])
-        assert error_log["event"] == "http_exception"
-        assert "request_id" in error_log
-        assert "exception" in error_log
+    # Last line should be the exception log.
+    error_log = json.loads(lines[-1])
+    assert error_log["event"] == "http_exception"
+    assert "request_id" in error_log
+    assert "exception" in error_log
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_auth_success(mock_stdout):
+def test_log_auth_success(log_output):
     """
     Authentication success logging includes username.
     """
-    configure_logging()
     log_auth_success("alice")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "authentication_success"
     assert log_entry["username"] == "alice"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_websocket_connect(mock_stdout):
+def test_log_websocket_connect(log_output):
     """
     WebSocket connection logging includes channel and username.
     """
-    configure_logging()
     log_websocket_connect("chat", "bob")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "websocket_connect"
@@ -262,15 +367,13 @@ def test_log_websocket_connect(mock_stdout):
     assert log_entry["username"] == "bob"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_websocket_disconnect(mock_stdout):
+def test_log_websocket_disconnect(log_output):
     """
     WebSocket disconnection logging includes channel and username.
     """
-    configure_logging()
     log_websocket_disconnect("chat", "bob")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "websocket_disconnect"
@@ -278,15 +381,13 @@ def test_log_websocket_disconnect(mock_stdout):
     assert log_entry["username"] == "bob"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_proxy_request(mock_stdout):
+def test_log_proxy_request(log_output):
     """
     Proxy request logging includes API details and username.
     """
-    configure_logging()
     log_proxy_request("openai", "/chat/completions", "POST", "alice")
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "proxy_request"
@@ -296,15 +397,13 @@ def test_log_proxy_request(mock_stdout):
     assert log_entry["username"] == "alice"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_proxy_response(mock_stdout):
+def test_log_proxy_response(log_output):
     """
     Proxy response logging includes status code.
     """
-    configure_logging()
     log_proxy_response("openai", 200)
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "proxy_response"
@@ -312,43 +411,54 @@ def test_log_proxy_response(mock_stdout):
     assert log_entry["status_code"] == 200
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_startup(mock_stdout):
+def test_proxy_loggers_are_cached_per_api(log_output):
+    """
+    Proxy logging reuses one bound logger per API until reconfigured.
+    """
+    log_proxy_request("openai", "/models", "GET", "alice")
+    log = _proxy_loggers["openai"]
+
+    log_proxy_response("openai", 200)
+
+    assert _proxy_loggers["openai"] is log
+
+    with patch("sys.stdout", log_output):
+        configure_logging()
+
+    assert "openai" not in _proxy_loggers
+
+
+def test_log_startup(log_output):
     """
     Startup logging creates appropriate event.
     """
-    configure_logging()
     log_startup()
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "application_startup"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_shutdown(mock_stdout):
+def test_log_shutdown(log_output):
     """
     Shutdown logging creates appropriate event.
     """
-    configure_logging()
     log_shutdown()
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "application_shutdown"
 
 
-@patch("sys.stdout", new_callable=StringIO)
-def test_log_config_loaded(mock_stdout):
+def test_log_config_loaded(log_output):
     """
     Configuration loaded logging includes counts.
     """
-    configure_logging()
     log_config_loaded(5, 3)
 
-    output = mock_stdout.getvalue()
+    output = log_output.getvalue()
     log_entry = json.loads(output.strip())
 
     assert log_entry["event"] == "configuration_loaded"
@@ -2,17 +2,41 @@
 Tests for API proxy.
 """
 
+import gzip
 import json
-from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock
 
 import httpx
 import pytest
-from fastapi.testclient import TestClient
 
-from thub.app import app
-from thub.auth import create_jwt_token
-from thub.proxy import proxy_request
+from thub.proxy import (
+    close_client,
+    get_base_prefix,
+    get_client,
+    get_stripped_headers,
+    proxy_request,
+)
+
+
+async def stream_body(content):
+    """
+    Yield content as a single chunk, like a streamed request body.
+    """
+    yield content
+
+
+def make_client(handler):
+    """
+    Build an HTTP client whose requests are answered in-process by handler.
+    """
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def read_body(response):
+    """
+    Collect the body of a streaming response.
+    """
+    return b"".join([chunk async for chunk in response.body_iterator])
 
 
 @pytest.fixture
@@ -44,150 +68,256 @@ def proxy_config(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_forwards_get_request(proxy_config):
+async def test_get_client_reuses_shared_client():
+    """
+    The shared HTTP client is created once and reused across calls.
+    """
+    client = get_client()
+
+    assert get_client() is client
+
+    await close_client()
+
+    assert client.is_closed
+    assert get_client() is not client
+
+    await close_client()
+
+
+def test_get_base_prefix_normalises_trailing_slashes():
+    """
+    Base URLs are normalised to end in exactly one slash.
+    """
+    assert get_base_prefix("https://api.example.com/v1") == (
+        "https://api.example.com/v1/"
+    )
+    assert get_base_prefix("https://api.example.com/v1//") == (
+        "https://api.example.com/v1/"
+    )
+
+
+@pytest.mark.asyncio
+async def test_proxy_request_forwards_get_request(proxy_config, monkeypatch):
     """
     Proxy forwards GET requests to configured API.
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b"")
+    mock_request.headers = {}
 
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b'{"result": "success"}'
-    mock_response.headers = {"content-type": "application/json"}
+    upstream_requests = []
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+    def handler(request):
+        upstream_requests.append(request)
+        return httpx.Response(
+            200,
+            content=b'{"result": "success"}',
+            headers={"content-type": "application/json"},
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
 
-        response = await proxy_request(
-            "testapi", "endpoint", "GET", mock_request, "alice"
-        )
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
 
-        assert response.status_code == 200
-        assert response.body == b'{"result": "success"}'
+    response = await proxy_request(
+        "testapi", "endpoint", "GET", mock_request, "alice"
+    )
 
-        # Verify request was made correctly.
-        mock_client_instance.request.assert_called_once()
-        call_args = mock_client_instance.request.call_args
-        assert call_args.kwargs["method"] == "GET"
-        assert call_args.kwargs["url"] == "https://api.example.com/v1/endpoint"
-        assert (
-            call_args.kwargs["headers"]["Authorization"] == "Bearer test_key"
-        )
+    assert response.status_code == 200
+    assert await read_body(response) == b'{"result": "success"}'
+
+    # Verify request was made correctly.
+    assert len(upstream_requests) == 1
+    upstream = upstream_requests[0]
+    assert upstream.method == "GET"
+    assert str(upstream.url) == "https://api.example.com/v1/endpoint"
+    assert upstream.headers["Authorization"] == "Bearer test_key"
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_forwards_post_with_body(proxy_config):
+async def test_proxy_request_forwards_post_with_body(
+    proxy_config, monkeypatch
+):
     """
     Proxy forwards POST requests with body content.
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b'{"data": "test"}')
+    mock_request.headers = {"content-length": "16"}
+    mock_request.stream = MagicMock(
+        return_value=stream_body(b'{"data": "test"}')
+    )
 
-    mock_response = MagicMock()
-    mock_response.status_code = 201
-    mock_response.content = b'{"id": 123}'
-    mock_response.headers = {"content-type": "application/json"}
+    upstream_requests = []
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+    def handler(request):
+        upstream_requests.append(request)
+        return httpx.Response(
+            201,
+            content=b'{"id": 123}',
+            headers={"content-type": "application/json"},
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
 
-        response = await proxy_request(
-            "testapi", "create", "POST", mock_request, "bob"
-        )
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "testapi", "create", "POST", mock_request, "bob"
+    )
 
-        assert response.status_code == 201
+    assert response.status_code == 201
 
-        # Verify body was forwarded.
-        call_args = mock_client_instance.request.call_args
-        assert call_args.kwargs["content"] == b'{"data": "test"}'
+    # Verify body was streamed through with its original length.
+    assert upstream_requests[0].method == "POST"
+    assert upstream_requests[0].content == b'{"data": "test"}'
+    assert upstream_requests[0].headers["content-length"] == "16"
+    assert "transfer-encoding" not in upstream_requests[0].headers
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_forwards_query_parameters(proxy_config):
+async def test_proxy_request_forwards_query_parameters(
+    proxy_config, monkeypatch
+):
     """
     Proxy forwards query parameters from original request.
     """
     mock_request = MagicMock()
     mock_request.query_params = {"page": "2", "limit": "10"}
-    mock_request.body = AsyncMock(return_value=b"")
+    mock_request.headers = {}
 
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b"[]"
-    mock_response.headers = {}
+    upstream_requests = []
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
-        )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
+    def handler(request):
+        upstream_requests.append(request)
+        return httpx.Response(200, content=b"[]")
+
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
 
-        await proxy_request("testapi", "items", "GET", mock_request, "charlie")
+    await proxy_request("testapi", "items", "GET", mock_request, "charlie")
 
-        # Verify query params were forwarded.
-        call_args = mock_client_instance.request.call_args
-        assert call_args.kwargs["params"] == {"page": "2", "limit": "10"}
+    # Verify query params were forwarded.
+    params = upstream_requests[0].url.params
+    assert dict(params) == {"page": "2", "limit": "10"}
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_strips_sensitive_response_headers(proxy_config):
+async def test_proxy_request_strips_sensitive_response_headers(
+    proxy_config, monkeypatch
+):
     """
     Proxy strips sensitive headers from responses.
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b"")
-
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b"data"
-    mock_response.headers = {
-        "content-type": "text/plain",
-        "set-cookie": "session=abc123",
-        "authorization": "Bearer secret",
-        "x-custom": "value",
-    }
+    mock_request.headers = {}
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            content=b"data",
+            headers={
+                "content-type": "text/plain",
+                "set-cookie": "session=abc123",
+                "authorization": "Bearer secret",
+                "x-custom": "value",
+            },
+        )
+
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "testapi", "data", "GET", mock_request, "dave"
+    )
+
+    # Check sensitive headers are stripped.
+    assert "set-cookie" not in response.headers
+    assert "authorization" not in response.headers
+    # Check non-sensitive headers are preserved.
+    assert "x-custom" in response.headers
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+
+@pytest.mark.asyncio
+async def test_proxy_request_strips_hop_by_hop_headers(
+    proxy_config, monkeypatch
+):
+    """
+    Proxy strips hop-by-hop headers that only apply to the upstream hop.
+    """
+    mock_request = MagicMock()
+    mock_request.query_params = {}
+    mock_request.headers = {}
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            content=b"data",
+            headers={
+                "content-type": "text/plain",
+                "Connection": "keep-alive",
+                "keep-alive": "timeout=5",
+                "upgrade": "h2c",
+                "x-custom": "value",
+            },
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
 
-        response = await proxy_request(
-            "testapi", "data", "GET", mock_request, "dave"
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "testapi", "data", "GET", mock_request, "dave"
+    )
+
+    assert "connection" not in response.headers
+    assert "keep-alive" not in response.headers
+    assert "upgrade" not in response.headers
+    assert "x-custom" in response.headers
+
+
+def test_get_stripped_headers_extends_defaults():
+    """
+    Extra header names are added to (never replace) the default set.
+    """
+    stripped = get_stripped_headers(("X-Internal-Trace",))
+
+    assert "x-internal-trace" in stripped
+    assert "set-cookie" in stripped
+    assert get_stripped_headers(("X-Internal-Trace",)) is stripped
+
+
+@pytest.mark.asyncio
+async def test_proxy_request_strips_configured_response_headers(
+    proxy_config, monkeypatch
+):
+    """
+    Proxy strips extra response headers listed in the API's config.
+    """
+    proxy_config["proxies"]["testapi"]["strip_response_headers"] = [
+        "X-Internal-Trace"
+    ]
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(proxy_config, f)
+
+    mock_request = MagicMock()
+    mock_request.query_params = {}
+    mock_request.headers = {}
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            content=b"data",
+            headers={"x-internal-trace": "abc", "x-custom": "value"},
         )
 
-        # Check sensitive headers are stripped.
-        assert "set-cookie" not in response.headers
-        assert "authorization" not in response.headers
-        # Check non-sensitive headers are preserved.
-        assert "x-custom" in response.headers
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "testapi", "data", "GET", mock_request, "dave"
+    )
+
+    assert "x-internal-trace" not in response.headers
+    assert "x-custom" in response.headers
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_strips_content_length_header(proxy_config):
+async def test_proxy_request_strips_content_length_header(
+    proxy_config, monkeypatch
+):
     """
     Proxy strips encoding headers to let FastAPI handle them correctly.
 
@@ -196,45 +326,42 @@ async def test_proxy_request_strips_content_length_header(proxy_config):
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b"")
-
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b'{"result": "success"}'  # Actual length: 21
-    mock_response.headers = {
-        "content-type": "application/json",
-        "content-length": "9999",  # Wrong length from upstream API.
-        "transfer-encoding": "chunked",
-        "content-encoding": "gzip",  # Compression header.
-    }
-
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+    mock_request.headers = {}
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            # Actual decoded length: 21.
+            content=gzip.compress(b'{"result": "success"}'),
+            headers={
+                "content-type": "application/json",
+                "content-length": "9999",  # Wrong length from upstream API.
+                "transfer-encoding": "chunked",
+                "content-encoding": "gzip",  # Compression header.
+            },
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
 
-        response = await proxy_request(
-            "testapi", "data", "GET", mock_request, "dave"
-        )
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "testapi", "data", "GET", mock_request, "dave"
+    )
 
-        # FastAPI will add Content-Length back with the CORRECT value.
-        # The key is that we stripped the incorrect value from upstream.
-        assert response.body == b'{"result": "success"}'
-        assert len(response.body) == 21
+    # FastAPI will add Content-Length back with the CORRECT value.
+    # The key is that we stripped the incorrect value from upstream.
+    body = await read_body(response)
+    assert body == b'{"result": "success"}'
+    assert len(body) == 21
 
-        # If Content-Length is present, it should be correct (21), not 9999.
-        if "content-length" in response.headers:
-            assert response.headers["content-length"] == "21"
+    # If Content-Length is present, it should be correct (21), not 9999.
+    if "content-length" in response.headers:
+        assert response.headers["content-length"] == "21"
 
-        # Transfer-Encoding should be stripped.
-        assert "transfer-encoding" not in response.headers
+    # Transfer-Encoding should be stripped.
+    assert "transfer-encoding" not in response.headers
 
-        # Content-Encoding should be stripped to prevent decode errors.
-        assert "content-encoding" not in response.headers
+    # Content-Encoding should be stripped to prevent decode errors.
+    assert "content-encoding" not in response.headers
 
 
 @pytest.mark.asyncio
@@ -244,7 +371,7 @@ async def test_proxy_request_returns_404_for_unknown_api(proxy_config):
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b"")
+    mock_request.headers = {}
 
     response = await proxy_request(
         "unknownapi", "endpoint", "GET", mock_request, "eve"
@@ -255,39 +382,57 @@ async def test_proxy_request_returns_404_for_unknown_api(proxy_config):
 
 
 @pytest.mark.asyncio
-async def test_proxy_request_handles_connection_errors(proxy_config):
+async def test_proxy_request_unknown_api_does_no_upstream_work(
+    proxy_config, monkeypatch
+):
+    """
+    Unknown API names are rejected before the body or upstream is touched.
+    """
+    mock_request = MagicMock()
+    mock_request.headers = {"content-length": "16"}
+
+    def handler(request):
+        raise AssertionError("Upstream should not be contacted.")
+
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
+
+    response = await proxy_request(
+        "unknownapi", "endpoint", "POST", mock_request, "eve"
+    )
+
+    assert response.status_code == 404
+    mock_request.stream.assert_not_called()
+    mock_request.body.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_proxy_request_handles_connection_errors(
+    proxy_config, monkeypatch
+):
     """
     Proxy handles connection errors gracefully.
     """
     mock_request = MagicMock()
     mock_request.query_params = {}
-    mock_request.body = AsyncMock(return_value=b"")
+    mock_request.headers = {}
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
-        )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(
-            side_effect=httpx.ConnectError("Connection failed")
-        )
-        mock_client.return_value = mock_client_instance
+    def handler(request):
+        raise httpx.ConnectError("Connection failed")
 
-        response = await proxy_request(
-            "testapi", "endpoint", "GET", mock_request, "frank"
-        )
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
 
-        assert response.status_code == 502
-        assert b"Proxy request failed" in response.body
+    response = await proxy_request(
+        "testapi", "endpoint", "GET", mock_request, "frank"
+    )
 
+    assert response.status_code == 502
+    assert b"Proxy request failed" in response.body
 
-def test_proxy_endpoint_requires_authentication(proxy_config):
+
+def test_proxy_endpoint_requires_authentication(proxy_config, client):
     """
     Proxy endpoint requires authentication.
     """
-    client = TestClient(app)
-
     response = client.get("/proxy/testapi/endpoint", follow_redirects=False)
 
     # Should redirect to login with next parameter.
@@ -297,61 +442,62 @@ def test_proxy_endpoint_requires_authentication(proxy_config):
     )
 
 
-def test_proxy_endpoint_get_request(proxy_config):
+def test_proxy_endpoint_get_request(
+    proxy_config, monkeypatch, client, make_token
+):
     """
     Proxy endpoint handles GET requests.
     """
-    token = create_jwt_token("alice", proxy_config)
+    token = make_token("alice", proxy_config)
 
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b'{"data": "test"}'
-    mock_response.headers = {"content-type": "application/json"}
+    upstream_responses = []
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+    def handler(request):
+        upstream = httpx.Response(
+            200,
+            content=b'{"data": "test"}',
+            headers={"content-type": "application/json"},
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
+        upstream_responses.append(upstream)
+        return upstream
+
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
 
-        client = TestClient(app)
-        client.cookies.set("session", token)
+    client.cookies.set("session", token)
 
-        response = client.get("/proxy/testapi/users")
+    response = client.get("/proxy/testapi/users")
 
-        assert response.status_code == 200
-        assert response.json() == {"data": "test"}
+    assert response.status_code == 200
+    assert response.json() == {"data": "test"}
 
+    # Upstream response is closed once the body has been streamed.
+    assert upstream_responses[0].is_closed
 
-def test_proxy_endpoint_post_request(proxy_config):
+
+def test_proxy_endpoint_post_request(
+    proxy_config, monkeypatch, client, make_token
+):
     """
     Proxy endpoint handles POST requests with body.
     """
-    token = create_jwt_token("bob", proxy_config)
+    token = make_token("bob", proxy_config)
 
-    mock_response = MagicMock()
-    mock_response.status_code = 201
-    mock_response.content = b'{"id": 123}'
-    mock_response.headers = {"content-type": "application/json"}
+    upstream_requests = []
 
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client_instance = MagicMock()
-        mock_client_instance.__aenter__ = AsyncMock(
-            return_value=mock_client_instance
+    def handler(request):
+        upstream_requests.append(request)
+        return httpx.Response(
+            201,
+            content=b'{"id": 123}',
+            headers={"content-type": "application/json"},
         )
-        mock_client_instance.__aexit__ = AsyncMock(return_value=None)
-        mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_client.return_value = mock_client_instance
 
-        client = TestClient(app)
-        client.cookies.set("session", token)
+    monkeypatch.setattr("thub.proxy._client", make_client(handler))
 
-        response = client.post(
-            "/proxy/testapi/users", json={"name": "Test User"}
-        )
+    client.cookies.set("session", token)
+
+    response = client.post("/proxy/testapi/users", json={"name": "Test User"})
 
-        assert response.status_code == 201
-        assert response.json() == {"id": 123}
+    assert response.status_code == 201
+    assert response.json() == {"id": 123}
+    assert json.loads(upstream_requests[0].content) == {"name": "Test User"}
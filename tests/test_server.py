@@ -3,6 +3,7 @@ Tests for server lifecycle management.
 """
 
 import json
+import os
 import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -17,15 +18,25 @@ from thub.server import (
 )
 
 
-def test_find_ssl_certificates_found(tmp_path, monkeypatch):
+@pytest.fixture
+def fake_cwd(fs):
     """
-    SSL certificates are found when .pem files exist.
+    An empty working directory on pyfakefs' in-memory filesystem.
     """
-    monkeypatch.chdir(tmp_path)
+    cwd = Path("/site")
+    fs.create_dir(cwd)
+    # Only the fake filesystem's working directory changes.
+    os.chdir(cwd)
+    return cwd
+
 
+def test_find_ssl_certificates_found(fake_cwd):
+    """
+    SSL certificates are found when .pem files exist.
+    """
     # Create mock certificate files.
-    key_file = tmp_path / "server-key.pem"
-    cert_file = tmp_path / "server-cert.pem"
+    key_file = fake_cwd / "server-key.pem"
+    cert_file = fake_cwd / "server-cert.pem"
     key_file.write_text("mock key")
     cert_file.write_text("mock cert")
 
@@ -35,24 +46,22 @@ def test_find_ssl_certificates_found(tmp_path, monkeypatch):
     assert ssl_certfile == str(cert_file)
 
 
-def test_find_ssl_certificates_not_found(tmp_path, monkeypatch):
+def test_find_ssl_certificates_not_found(fake_cwd):
     """
     Returns None, None when no .pem files exist.
     """
-    monkeypatch.chdir(tmp_path)
-
     ssl_keyfile, ssl_certfile = find_ssl_certificates()
 
     assert ssl_keyfile is None
     assert ssl_certfile is None
 
 
-def test_find_ssl_certificates_custom_directory(tmp_path):
+def test_find_ssl_certificates_custom_directory(fake_cwd):
     """
     Can search custom directory for certificates.
     """
     # Create certificate files in custom directory.
-    cert_dir = tmp_path / "certs"
+    cert_dir = fake_cwd / "certs"
     cert_dir.mkdir()
 
     key_file = cert_dir / "my-key.pem"
@@ -66,14 +75,12 @@ def test_find_ssl_certificates_custom_directory(tmp_path):
     assert ssl_certfile == str(cert_file)
 
 
-def test_find_ssl_certificates_incomplete(tmp_path, monkeypatch):
+def test_find_ssl_certificates_incomplete(fake_cwd):
     """
     Returns None, None when only one .pem file exists.
     """
-    monkeypatch.chdir(tmp_path)
-
     # Create only key file.
-    key_file = tmp_path / "server-key.pem"
+    key_file = fake_cwd / "server-key.pem"
     key_file.write_text("mock key")
 
     ssl_keyfile, ssl_certfile = find_ssl_certificates()
@@ -82,26 +89,22 @@ def test_find_ssl_certificates_incomplete(tmp_path, monkeypatch):
     assert ssl_certfile is None
 
 
-def test_start_server_no_config(tmp_path, monkeypatch):
+def test_start_server_no_config(fake_cwd):
     """
     Starting server without config.json raises FileNotFoundError.
     """
-    monkeypatch.chdir(tmp_path)
-
     with pytest.raises(FileNotFoundError) as exc_info:
         start_server(block=True)
 
     assert "config.json not found" in str(exc_info.value)
 
 
-def test_start_server_invalid_config(tmp_path, monkeypatch):
+def test_start_server_invalid_config(fake_cwd):
     """
     Starting server with invalid config.json raises ValueError.
     """
-    monkeypatch.chdir(tmp_path)
-
     # Create invalid config.
-    config_path = tmp_path / "config.json"
+    config_path = fake_cwd / "config.json"
     config_path.write_text("invalid json")
 
     with pytest.raises(ValueError) as exc_info:
@@ -110,22 +113,29 @@ def test_start_server_invalid_config(tmp_path, monkeypatch):
     assert "Invalid config.json" in str(exc_info.value)
 
 
-@patch("thub.server.uvicorn.run")
-def test_start_server_blocking_mode(mock_uvicorn_run, tmp_path, monkeypatch):
+@pytest.fixture(scope="module")
+def valid_config_dir(tmp_path_factory):
     """
-    Blocking mode calls uvicorn.run directly.
+    A directory with a valid config.json, used as the working directory.
     """
-    monkeypatch.chdir(tmp_path)
-
-    # Create valid config.
-    config_path = tmp_path / "config.json"
+    config_dir = tmp_path_factory.mktemp("server")
     config = {
         "users": {},
         "proxies": {},
         "jwt": {"secret": "test_secret", "expiry_hours": 24},
     }
-    config_path.write_text(json.dumps(config))
+    (config_dir / "config.json").write_text(json.dumps(config))
 
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(config_dir)
+        yield config_dir
+
+
+@patch("thub.server.uvicorn.run")
+def test_start_server_blocking_mode(mock_uvicorn_run, valid_config_dir):
+    """
+    Blocking mode calls uvicorn.run directly.
+    """
     result = start_server(
         host="0.0.0.0",
         port=9000,
@@ -143,35 +153,55 @@ def test_start_server_blocking_mode(mock_uvicorn_run, tmp_path, monkeypatch):
     assert call_kwargs["host"] == "0.0.0.0"
     assert call_kwargs["port"] == 9000
     assert call_kwargs["reload"] is True
-
-
+    assert call_kwargs["ws_per_message_deflate"] is False
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected_args",
+    [
+        (
+            {"reload": False},
+            [
+                "--host",
+                "127.0.0.1",
+                "--port",
+                "8000",
+                "--ws-per-message-deflate",
+                "false",
+            ],
+        ),
+        (
+            {
+                "ssl_keyfile": "/path/to/key.pem",
+                "ssl_certfile": "/path/to/cert.pem",
+            },
+            [
+                "--ssl-keyfile",
+                "/path/to/key.pem",
+                "--ssl-certfile",
+                "/path/to/cert.pem",
+            ],
+        ),
+        (
+            {"reload": True},
+            ["--reload"],
+        ),
+    ],
+    ids=["mode", "with_ssl", "with_reload"],
+)
 @patch("thub.server.subprocess.Popen")
-def test_start_server_nonblocking_mode(mock_popen, tmp_path, monkeypatch):
+def test_start_server_nonblocking(
+    mock_popen, kwargs, expected_args, valid_config_dir
+):
     """
-    Non-blocking mode starts server in subprocess.
+    Non-blocking mode starts server in subprocess with the given options.
     """
-    monkeypatch.chdir(tmp_path)
-
-    # Create valid config.
-    config_path = tmp_path / "config.json"
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-    config_path.write_text(json.dumps(config))
-
     # Mock process.
     mock_process = MagicMock()
     mock_process.poll.return_value = None  # Still running.
     mock_popen.return_value = mock_process
 
-    result = start_server(
-        host="127.0.0.1",
-        port=8000,
-        reload=False,
-        block=False,
-    )
+    result = start_server(host="127.0.0.1", port=8000, block=False, **kwargs)
 
     # Should return process object.
     assert result == mock_process
@@ -181,100 +211,15 @@ def test_start_server_nonblocking_mode(mock_popen, tmp_path, monkeypatch):
     call_args = mock_popen.call_args[0][0]
 
     assert "uvicorn" in " ".join(call_args)
-    assert "--host" in call_args
-    assert "127.0.0.1" in call_args
-    assert "--port" in call_args
-    assert "8000" in call_args
-
-
-@patch("thub.server.subprocess.Popen")
-def test_start_server_nonblocking_with_ssl(mock_popen, tmp_path, monkeypatch):
-    """
-    Non-blocking mode includes SSL args when provided.
-    """
-    monkeypatch.chdir(tmp_path)
-
-    # Create valid config.
-    config_path = tmp_path / "config.json"
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-    config_path.write_text(json.dumps(config))
-
-    # Mock process.
-    mock_process = MagicMock()
-    mock_process.poll.return_value = None
-    mock_popen.return_value = mock_process
-
-    start_server(
-        host="127.0.0.1",
-        port=8000,
-        ssl_keyfile="/path/to/key.pem",
-        ssl_certfile="/path/to/cert.pem",
-        block=False,
-    )
-
-    call_args = mock_popen.call_args[0][0]
-
-    assert "--ssl-keyfile" in call_args
-    assert "/path/to/key.pem" in call_args
-    assert "--ssl-certfile" in call_args
-    assert "/path/to/cert.pem" in call_args
+    for arg in expected_args:
+        assert arg in call_args
 
 
 @patch("thub.server.subprocess.Popen")
-def test_start_server_nonblocking_with_reload(
-    mock_popen, tmp_path, monkeypatch
-):
-    """
-    Non-blocking mode includes --reload flag when enabled.
-    """
-    monkeypatch.chdir(tmp_path)
-
-    # Create valid config.
-    config_path = tmp_path / "config.json"
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-    config_path.write_text(json.dumps(config))
-
-    # Mock process.
-    mock_process = MagicMock()
-    mock_process.poll.return_value = None
-    mock_popen.return_value = mock_process
-
-    start_server(
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
-        block=False,
-    )
-
-    call_args = mock_popen.call_args[0][0]
-
-    assert "--reload" in call_args
-
-
-@patch("thub.server.subprocess.Popen")
-def test_start_server_subprocess_failure(mock_popen, tmp_path, monkeypatch):
+def test_start_server_subprocess_failure(mock_popen, valid_config_dir):
     """
     Raises RuntimeError if subprocess fails to start.
     """
-    monkeypatch.chdir(tmp_path)
-
-    # Create valid config.
-    config_path = tmp_path / "config.json"
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-    config_path.write_text(json.dumps(config))
-
     # Mock process that fails immediately.
     mock_process = MagicMock()
     mock_process.poll.return_value = 1  # Exited with error.
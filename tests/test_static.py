@@ -3,38 +3,64 @@ Tests for static file serving.
 """
 
 import json
-from pathlib import Path
+import shutil
 
 import pytest
-from fastapi.testclient import TestClient
 
-from thub.app import app
-from thub.auth import create_jwt_token
+CONFIG = {
+    "users": {},
+    "proxies": {},
+    "jwt": {"secret": "test_secret", "expiry_hours": 24},
+}
+CONFIG_JSON = json.dumps(CONFIG)
 
 
-def test_serve_static_file(tmp_path, monkeypatch):
+@pytest.fixture(scope="module")
+def static_root(tmp_path_factory):
     """
-    Static file serving returns file content.
+    A site directory with a config.json, used as the working directory for
+    every test in the module.
+    """
+    root = tmp_path_factory.mktemp("static")
+    (root / "config.json").write_text(CONFIG_JSON, encoding="utf-8")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(root)
+        yield root
+
+
+@pytest.fixture
+def site(static_root):
+    """
+    The shared site directory, emptied of the files each test creates.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    yield static_root
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    for path in static_root.iterdir():
+        if path.name == "config.json":
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
 
+@pytest.fixture
+def token(make_token):
+    """
+    A session token for alice.
+    """
+    return make_token("alice", CONFIG)
+
+
+def test_serve_static_file(site, client, token):
+    """
+    Static file serving returns file content.
+    """
     # Create a test file.
-    test_file = tmp_path / "test.html"
+    test_file = site / "test.html"
     test_file.write_text("<h1>Hello World</h1>", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/test.html")
@@ -43,31 +69,16 @@ def test_serve_static_file(tmp_path, monkeypatch):
     assert response.text == "<h1>Hello World</h1>"
 
 
-def test_serve_static_file_in_subdirectory(tmp_path, monkeypatch):
+def test_serve_static_file_in_subdirectory(site, client, token):
     """
     Static file serving works for files in subdirectories.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create subdirectory with file.
-    subdir = tmp_path / "examples" / "test"
+    subdir = site / "examples" / "test"
     subdir.mkdir(parents=True)
     test_file = subdir / "index.html"
     test_file.write_text("<h1>Example</h1>", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/examples/test/index.html")
@@ -76,25 +87,10 @@ def test_serve_static_file_in_subdirectory(tmp_path, monkeypatch):
     assert response.text == "<h1>Example</h1>"
 
 
-def test_serve_static_blocks_config_json(tmp_path, monkeypatch):
+def test_serve_static_blocks_config_json(site, client, token):
     """
     Static file serving blocks access to config.json.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/config.json")
@@ -102,29 +98,14 @@ def test_serve_static_blocks_config_json(tmp_path, monkeypatch):
     assert response.status_code == 404
 
 
-def test_serve_static_blocks_pem_files(tmp_path, monkeypatch):
+def test_serve_static_blocks_pem_files(site, client, token):
     """
     Static file serving blocks access to .pem files.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a .pem file.
-    pem_file = tmp_path / "certificate.pem"
+    pem_file = site / "certificate.pem"
     pem_file.write_text("SECRET KEY DATA", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/certificate.pem")
@@ -132,29 +113,14 @@ def test_serve_static_blocks_pem_files(tmp_path, monkeypatch):
     assert response.status_code == 404
 
 
-def test_serve_static_prevents_directory_traversal(tmp_path, monkeypatch):
+def test_serve_static_prevents_directory_traversal(site, client, token):
     """
     Static file serving prevents directory traversal attacks.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a file outside the current directory.
-    parent_file = tmp_path.parent / "secret.txt"
+    parent_file = site.parent / "secret.txt"
     parent_file.write_text("SECRET DATA", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     # Try to access file outside current directory.
@@ -163,25 +129,10 @@ def test_serve_static_prevents_directory_traversal(tmp_path, monkeypatch):
     assert response.status_code == 404
 
 
-def test_serve_static_returns_404_for_nonexistent_file(tmp_path, monkeypatch):
+def test_serve_static_returns_404_for_nonexistent_file(site, client, token):
     """
     Static file serving returns 404 for non-existent files.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/nonexistent.html")
@@ -189,29 +140,14 @@ def test_serve_static_returns_404_for_nonexistent_file(tmp_path, monkeypatch):
     assert response.status_code == 404
 
 
-def test_serve_static_returns_404_for_directory(tmp_path, monkeypatch):
+def test_serve_static_returns_404_for_directory(site, client, token):
     """
     Static file serving returns 404 for directories without index.html.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a directory without index.html.
-    test_dir = tmp_path / "examples"
+    test_dir = site / "examples"
     test_dir.mkdir()
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/examples")
@@ -219,31 +155,16 @@ def test_serve_static_returns_404_for_directory(tmp_path, monkeypatch):
     assert response.status_code == 404
 
 
-def test_serve_static_serves_index_html_for_directory(tmp_path, monkeypatch):
+def test_serve_static_serves_index_html_for_directory(site, client, token):
     """
     Static file serving serves index.html for directory requests.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a directory with index.html.
-    test_dir = tmp_path / "examples"
+    test_dir = site / "examples"
     test_dir.mkdir()
     index_file = test_dir / "index.html"
     index_file.write_text("<h1>Example Index</h1>", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/examples")
@@ -253,32 +174,17 @@ def test_serve_static_serves_index_html_for_directory(tmp_path, monkeypatch):
 
 
 def test_serve_static_serves_index_html_with_trailing_slash(
-    tmp_path, monkeypatch
+    site, client, token
 ):
     """
     Static file serving serves index.html with trailing slash.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a directory with index.html.
-    test_dir = tmp_path / "examples"
+    test_dir = site / "examples"
     test_dir.mkdir()
     index_file = test_dir / "index.html"
     index_file.write_text("<h1>Example Index</h1>", encoding="utf-8")
 
-    token = create_jwt_token("alice", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/examples/")
@@ -287,28 +193,14 @@ def test_serve_static_serves_index_html_with_trailing_slash(
     assert response.text == "<h1>Example Index</h1>"
 
 
-def test_serve_static_requires_authentication(tmp_path, monkeypatch):
+def test_serve_static_requires_authentication(site, client):
     """
     Static file serving requires authentication.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a test file.
-    test_file = tmp_path / "test.html"
+    test_file = site / "test.html"
     test_file.write_text("<h1>Hello World</h1>", encoding="utf-8")
 
-    client = TestClient(app)
-
     response = client.get("/test.html", follow_redirects=False)
 
     # Should redirect to login with next parameter.
@@ -316,37 +208,14 @@ def test_serve_static_requires_authentication(tmp_path, monkeypatch):
     assert response.headers["location"] == "/login?next=/test.html"
 
 
-def test_static_files_have_no_cache_headers(tmp_path, monkeypatch):
+def test_static_files_have_no_cache_headers(site, client, token):
     """
     Static files are served with no-cache headers to prevent stale content.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {
-            "testuser": {
-                "password_hash": "somehash",
-                "salt": "somesalt",
-            }
-        },
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
     # Create a test file.
-    test_file = tmp_path / "test.html"
+    test_file = site / "test.html"
     test_file.write_text("<h1>Hello World</h1>", encoding="utf-8")
 
-    # Create a valid JWT token.
-    from thub.auth import create_jwt_token
-
-    token = create_jwt_token("testuser", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     response = client.get("/test.html")
@@ -359,33 +228,10 @@ def test_static_files_have_no_cache_headers(tmp_path, monkeypatch):
     assert "must-revalidate" in response.headers["cache-control"]
 
 
-def test_404_page_is_playful(tmp_path, monkeypatch):
+def test_404_page_is_playful(site, client, token):
     """
     404 errors return a playful custom error page.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
-
-    config = {
-        "users": {
-            "testuser": {
-                "password_hash": "somehash",
-                "salt": "somesalt",
-            }
-        },
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
-
-    # Create a valid JWT token.
-    from thub.auth import create_jwt_token
-
-    token = create_jwt_token("testuser", config)
-
-    client = TestClient(app)
     client.cookies.set("session", token)
 
     # Try to access a non-existent file.
@@ -2,376 +2,558 @@
 Tests for WebSocket channels.
 """
 
-import json
-from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import sys
+from contextlib import AsyncExitStack
 
+import orjson
 import pytest
-from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 
-from thub.app import app
-from thub.auth import create_jwt_token
 from thub.websocket import (
+    BROADCAST_BATCH_SIZE,
     broadcast,
-    channels,
     connect,
     disconnect,
     get_connection_count,
 )
 
+CONFIG = {
+    "users": {},
+    "proxies": {},
+    "jwt": {"secret": "test_secret", "expiry_hours": 24},
+}
+
+
+@pytest.fixture(scope="module")
+def shared_config(tmp_path_factory):
+    """
+    A directory holding config.json, written once for the module.
+    """
+    config_dir = tmp_path_factory.mktemp("websocket")
+    (config_dir / "config.json").write_bytes(orjson.dumps(CONFIG))
+    return config_dir
+
+
+@pytest.fixture(scope="module")
+def alice_token(make_token):
+    """
+    A session token for alice, signed once for the module.
+    """
+    return make_token("alice", CONFIG)
+
 
 @pytest.fixture
-def clear_channels():
+def channels(monkeypatch):
     """
-    Clear channels before each test.
+    A fresh, empty channel registry for each test.
     """
-    channels.clear()
-    yield
-    channels.clear()
+    registry = {}
+    monkeypatch.setattr("thub.websocket.channels", registry)
+    return registry
 
 
-def test_connect_adds_websocket_to_channel(clear_channels):
+class FakeWebSocket:
     """
-    Connecting adds WebSocket to channel tracking.
+    A minimal stand-in for a WebSocket that records the messages it is sent.
+
+    An optional on_send coroutine function is awaited with each message.
     """
-    mock_ws = MagicMock()
-    mock_ws.accept = AsyncMock()
 
-    import asyncio
+    __slots__ = ("accepted", "sent", "on_send")
+
+    def __init__(self, on_send=None):
+        self.accepted = False
+        self.sent = []
+        self.on_send = on_send
+
+    async def accept(self):
+        self.accepted = True
 
-    asyncio.run(connect(mock_ws, "test_channel", "alice"))
+    async def send_text(self, message):
+        self.sent.append(message)
+        if self.on_send is not None:
+            await self.on_send(message)
+
+
+def run_sync(coro):
+    """
+    Run a coroutine that completes without suspending, with no event loop.
+
+    Raises RuntimeError if the coroutine does suspend.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended and needs an event loop.")
+
+
+def test_connect_adds_websocket_to_channel(channels):
+    """
+    Connecting adds WebSocket to channel tracking.
+    """
+    ws = FakeWebSocket()
+
+    run_sync(connect(ws, "test_channel", "alice"))
 
     assert "test_channel" in channels
-    assert (mock_ws, "alice") in channels["test_channel"]
-    mock_ws.accept.assert_called_once()
+    assert (ws, "alice") in channels["test_channel"]
+    assert ws.accepted
 
 
-def test_connect_creates_channel_if_not_exists(clear_channels):
+def test_connect_creates_channel_if_not_exists(channels):
     """
     Connecting to non-existent channel creates it.
     """
-    mock_ws = MagicMock()
-    mock_ws.accept = AsyncMock()
+    ws = FakeWebSocket()
 
     assert "new_channel" not in channels
 
-    import asyncio
-
-    asyncio.run(connect(mock_ws, "new_channel", "bob"))
+    run_sync(connect(ws, "new_channel", "bob"))
 
     assert "new_channel" in channels
 
 
-def test_disconnect_removes_websocket_from_channel(clear_channels):
+def test_disconnect_removes_websocket_from_channel(channels):
     """
     Disconnecting removes WebSocket from channel.
     """
-    mock_ws = MagicMock()
-    mock_ws.accept = AsyncMock()
-
-    import asyncio
+    ws = FakeWebSocket()
 
-    asyncio.run(connect(mock_ws, "test_channel", "alice"))
+    run_sync(connect(ws, "test_channel", "alice"))
 
-    assert (mock_ws, "alice") in channels["test_channel"]
+    assert (ws, "alice") in channels["test_channel"]
 
-    disconnect(mock_ws, "test_channel", "alice")
+    disconnect(ws, "test_channel", "alice")
 
-    assert (mock_ws, "alice") not in channels.get("test_channel", set())
+    assert (ws, "alice") not in channels.get("test_channel", ())
 
 
-def test_disconnect_removes_empty_channel(clear_channels):
+def test_disconnect_removes_empty_channel(channels):
     """
     Disconnecting last connection removes channel.
     """
-    mock_ws = MagicMock()
-    mock_ws.accept = AsyncMock()
-
-    import asyncio
+    ws = FakeWebSocket()
 
-    asyncio.run(connect(mock_ws, "test_channel", "alice"))
+    run_sync(connect(ws, "test_channel", "alice"))
 
     assert "test_channel" in channels
 
-    disconnect(mock_ws, "test_channel", "alice")
+    disconnect(ws, "test_channel", "alice")
 
     assert "test_channel" not in channels
 
 
-def test_disconnect_handles_nonexistent_channel(clear_channels):
+def test_disconnect_handles_nonexistent_channel(channels):
     """
     Disconnecting from non-existent channel does not raise error.
     """
-    mock_ws = MagicMock()
+    ws = FakeWebSocket()
 
     # Should not raise an exception.
-    disconnect(mock_ws, "nonexistent", "alice")
+    disconnect(ws, "nonexistent", "alice")
 
 
-def test_broadcast_sends_to_all_except_sender(clear_channels):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_sends_to_all_except_sender(channels):
     """
     Broadcasting sends message to all connections except sender.
     """
-    mock_ws1 = MagicMock()
-    mock_ws1.accept = AsyncMock()
-    mock_ws1.send_text = AsyncMock()
+    ws1 = FakeWebSocket()
+    ws2 = FakeWebSocket()
+    ws3 = FakeWebSocket()
 
-    mock_ws2 = MagicMock()
-    mock_ws2.accept = AsyncMock()
-    mock_ws2.send_text = AsyncMock()
+    await connect(ws1, "chat", "alice")
+    await connect(ws2, "chat", "bob")
+    await connect(ws3, "chat", "charlie")
 
-    mock_ws3 = MagicMock()
-    mock_ws3.accept = AsyncMock()
-    mock_ws3.send_text = AsyncMock()
-
-    import asyncio
-
-    asyncio.run(connect(mock_ws1, "chat", "alice"))
-    asyncio.run(connect(mock_ws2, "chat", "bob"))
-    asyncio.run(connect(mock_ws3, "chat", "charlie"))
-
-    asyncio.run(broadcast("Hello!", "chat", mock_ws1))
+    await broadcast("Hello!", "chat", ws1)
 
     # Sender should not receive message.
-    mock_ws1.send_text.assert_not_called()
+    assert ws1.sent == []
 
     # Other connections should receive message.
-    mock_ws2.send_text.assert_called_once_with("Hello!")
-    mock_ws3.send_text.assert_called_once_with("Hello!")
+    assert ws2.sent == ["Hello!"]
+    assert ws3.sent == ["Hello!"]
 
 
-def test_broadcast_to_nonexistent_channel_does_nothing(clear_channels):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_sends_concurrently(channels):
     """
-    Broadcasting to non-existent channel does not raise error.
+    Broadcasting does not wait for one send to finish before starting the next.
     """
-    mock_ws = MagicMock()
+    ready = asyncio.Event()
 
-    import asyncio
+    async def wait_for_ready(message):
+        await ready.wait()
 
-    # Should not raise an exception.
-    asyncio.run(broadcast("Hello!", "nonexistent", mock_ws))
+    async def set_ready(message):
+        ready.set()
 
+    ws1 = FakeWebSocket()
+    ws2 = FakeWebSocket(on_send=wait_for_ready)
+    ws3 = FakeWebSocket(on_send=set_ready)
 
-def test_get_connection_count_returns_correct_count(clear_channels):
-    """
-    Connection count returns number of connections in channel.
-    """
-    mock_ws1 = MagicMock()
-    mock_ws1.accept = AsyncMock()
-
-    mock_ws2 = MagicMock()
-    mock_ws2.accept = AsyncMock()
-
-    import asyncio
+    await connect(ws1, "chat", "alice")
+    await connect(ws2, "chat", "bob")
+    await connect(ws3, "chat", "charlie")
 
-    asyncio.run(connect(mock_ws1, "chat", "alice"))
-    asyncio.run(connect(mock_ws2, "chat", "bob"))
+    # Sent one at a time, bob's send would wait forever for charlie's.
+    await asyncio.wait_for(broadcast("Hello!", "chat", ws1), timeout=1)
 
-    assert get_connection_count("chat") == 2
+    assert ws2.sent == ["Hello!"]
+    assert ws3.sent == ["Hello!"]
 
 
-def test_get_connection_count_returns_zero_for_nonexistent_channel(
-    clear_channels,
-):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_sends_to_large_channels_in_batches(channels):
     """
-    Connection count returns zero for non-existent channel.
+    Broadcasting to a large channel bounds in-flight sends and yields to
+    other tasks between batches.
     """
-    assert get_connection_count("nonexistent") == 0
+    in_flight = 0
+    max_in_flight = 0
+    events = []
 
+    async def track_send(message):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        events.append("send")
 
-def test_channel_isolation(clear_channels):
-    """
-    Messages in one channel do not affect other channels.
-    """
-    mock_ws1 = MagicMock()
-    mock_ws1.accept = AsyncMock()
-    mock_ws1.send_text = AsyncMock()
+    websockets = []
+    for i in range(200):
+        ws = FakeWebSocket(on_send=track_send)
+        websockets.append(ws)
+        await connect(ws, "chat", f"user{i}")
 
-    mock_ws2 = MagicMock()
-    mock_ws2.accept = AsyncMock()
-    mock_ws2.send_text = AsyncMock()
+    async def marker():
+        events.append("marker")
 
-    import asyncio
+    marker_task = asyncio.create_task(marker())
+    await broadcast("Hello!", "chat", websockets[0])
+    await marker_task
 
-    asyncio.run(connect(mock_ws1, "chat", "alice"))
-    asyncio.run(connect(mock_ws2, "notifications", "bob"))
-
-    asyncio.run(broadcast("Hello!", "chat", MagicMock()))
-
-    # Only chat channel should receive message.
-    mock_ws1.send_text.assert_called_once_with("Hello!")
-    mock_ws2.send_text.assert_not_called()
+    assert events.count("send") == 199
+    assert max_in_flight <= BROADCAST_BATCH_SIZE
+    # The unrelated task ran before the broadcast finished.
+    assert events.index("marker") < len(events) - 1
 
 
-def test_websocket_endpoint_rejects_without_token(tmp_path, monkeypatch):
+@pytest.mark.benchmark(group="broadcast")
+def test_broadcast_fanout_benchmark(benchmark, channels):
     """
-    WebSocket endpoint rejects connection without token.
+    Benchmark one broadcast to a channel with 1000 connections.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    loop = asyncio.new_event_loop()
+    try:
+        websockets = [FakeWebSocket() for _ in range(1000)]
+        for i, ws in enumerate(websockets):
+            run_sync(connect(ws, "chat", f"user{i}"))
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+        benchmark(
+            lambda: loop.run_until_complete(broadcast("x", "chat", None))
+        )
+    finally:
+        loop.close()
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
+    assert all(ws.sent for ws in websockets)
 
-    client = TestClient(app)
 
-    with pytest.raises(Exception):
-        with client.websocket_connect("/channel/test"):
-            pass
-
-
-def test_websocket_endpoint_rejects_with_invalid_token(tmp_path, monkeypatch):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_continues_past_failed_send(channels):
     """
-    WebSocket endpoint rejects connection with invalid token.
+    A connection that fails to send does not stop delivery to the others.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    async def fail(message):
+        raise RuntimeError("closed")
+
+    ws1 = FakeWebSocket(on_send=fail)
+    ws2 = FakeWebSocket()
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
+    await connect(ws1, "chat", "alice")
+    await connect(ws2, "chat", "bob")
 
-    client = TestClient(app)
+    await broadcast("Hello!", "chat", FakeWebSocket())
 
-    with pytest.raises(Exception):
-        with client.websocket_connect("/channel/test?token=invalid"):
-            pass
+    assert ws2.sent == ["Hello!"]
 
 
-def test_websocket_endpoint_accepts_valid_token(tmp_path, monkeypatch):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_survives_connections_joining_mid_broadcast(
+    channels,
+):
     """
-    WebSocket endpoint accepts connection with valid token in query param.
+    A connection joining during a broadcast neither breaks it nor receives it.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    newcomer = FakeWebSocket()
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    async def join(message):
+        await connect(newcomer, "chat", "charlie")
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
+    ws1 = FakeWebSocket()
+    ws2 = FakeWebSocket(on_send=join)
+    ws3 = FakeWebSocket()
 
-    token = create_jwt_token("alice", config)
+    await connect(ws1, "chat", "alice")
+    await connect(ws2, "chat", "bob")
+    await connect(ws3, "chat", "dave")
 
-    client = TestClient(app)
+    await broadcast("Hello!", "chat", ws1)
 
-    with client.websocket_connect(f"/channel/test?token={token}") as ws:
-        # Connection successful, send a message.
-        ws.send_text("Hello!")
+    assert ws2.sent == ["Hello!"]
+    assert ws3.sent == ["Hello!"]
+    assert newcomer.sent == []
+    assert (newcomer, "charlie") in channels["chat"]
 
 
-def test_websocket_endpoint_accepts_cookie_auth(tmp_path, monkeypatch):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_broadcast_to_nonexistent_channel_does_nothing(channels):
     """
-    WebSocket endpoint accepts connection with valid session cookie.
+    Broadcasting to non-existent channel does not raise error.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    ws = FakeWebSocket()
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    # Should not raise an exception.
+    await broadcast("Hello!", "nonexistent", ws)
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
 
-    token = create_jwt_token("alice", config)
+def test_get_connection_count_returns_correct_count(channels):
+    """
+    Connection count returns number of connections in channel.
+    """
+    run_sync(connect(FakeWebSocket(), "chat", "alice"))
+    run_sync(connect(FakeWebSocket(), "chat", "bob"))
 
-    client = TestClient(app)
+    assert get_connection_count("chat") == 2
 
-    # Set cookie in test client.
-    client.cookies.set("session", token)
 
-    with client.websocket_connect("/channel/test") as ws:
-        # Connection successful, send a message.
-        ws.send_text("Hello from cookie auth!")
+def test_get_connection_count_returns_zero_for_nonexistent_channel(
+    channels,
+):
+    """
+    Connection count returns zero for non-existent channel.
+    """
+    assert get_connection_count("nonexistent") == 0
 
 
-def test_websocket_broadcasts_messages(tmp_path, monkeypatch, clear_channels):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_channel_isolation(channels):
     """
-    WebSocket broadcasts messages to other connected clients.
+    Messages in one channel do not affect other channels.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    ws1 = FakeWebSocket()
+    ws2 = FakeWebSocket()
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    await connect(ws1, "chat", "alice")
+    await connect(ws2, "notifications", "bob")
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
+    await broadcast("Hello!", "chat", FakeWebSocket())
 
-    token1 = create_jwt_token("alice", config)
-    token2 = create_jwt_token("bob", config)
+    # Only chat channel should receive message.
+    assert ws1.sent == ["Hello!"]
+    assert ws2.sent == []
+
+
+class ASGIWebSocket:
+    """
+    A websocket connection to the app, driven in-process on the test's event
+    loop by calling the ASGI app directly with a pair of message queues.
+
+    Entering the context performs the handshake and raises WebSocketDisconnect
+    if the app closes the connection instead of accepting it.
+    """
+
+    def __init__(self, path, token=None, cookie=None):
+        headers = []
+        if cookie:
+            headers.append((b"cookie", f"session={cookie}".encode()))
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000),
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": f"token={token}".encode() if token else b"",
+            "headers": headers,
+            "subprotocols": [],
+        }
+        self.to_app = asyncio.Queue()
+        self.from_app = asyncio.Queue()
+        self.task = None
+
+    async def __aenter__(self):
+        from thub.app import app
+
+        self.task = asyncio.create_task(
+            app(self.scope, self.to_app.get, self.from_app.put)
+        )
+        await self.to_app.put({"type": "websocket.connect"})
+
+        message = await self._receive()
+        if message["type"] == "websocket.close":
+            await self.task
+            raise WebSocketDisconnect(message.get("code", 1000))
+        assert message["type"] == "websocket.accept"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+    async def _receive(self):
+        """
+        Return the app's next message, re-raising any error from the app.
+        """
+        get = asyncio.ensure_future(self.from_app.get())
+        await asyncio.wait(
+            {get, self.task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if get.done():
+            return get.result()
+        get.cancel()
+        self.task.result()
+        raise RuntimeError("App finished without sending a message.")
+
+    async def send_text(self, text):
+        await self.to_app.put({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self):
+        message = await self._receive()
+        assert message["type"] == "websocket.send"
+        return message["text"]
+
+
+@pytest.mark.xdist_group("websocket")
+@pytest.mark.parametrize(
+    "auth, accepted",
+    [
+        (None, False),
+        ("invalid_query", False),
+        ("valid_query", True),
+        ("valid_cookie", True),
+    ],
+)
+@pytest.mark.asyncio(loop_scope="module")
+async def test_websocket_endpoint_authentication(
+    auth, accepted, shared_config, monkeypatch, channels, alice_token
+):
+    """
+    WebSocket endpoint only accepts connections with a valid token, given as
+    a query param or the session cookie.
+    """
+    monkeypatch.chdir(shared_config)
+
+    kwargs = {}
+    if auth == "invalid_query":
+        kwargs["token"] = "invalid"
+    elif auth == "valid_query":
+        kwargs["token"] = alice_token
+    elif auth == "valid_cookie":
+        kwargs["cookie"] = alice_token
+
+    if accepted:
+        async with ASGIWebSocket("/channel/test", **kwargs) as ws:
+            # Connection successful, send a message.
+            await ws.send_text("Hello!")
+    else:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            async with ASGIWebSocket("/channel/test", **kwargs):
+                pass
+        assert exc_info.value.code == 1008
+
+
+@pytest.mark.xdist_group("websocket")
+@pytest.mark.asyncio(loop_scope="module")
+async def test_websocket_broadcasts_messages(
+    shared_config, monkeypatch, channels, alice_token, make_token
+):
+    """
+    WebSocket broadcasts messages to other connected clients.
+    """
+    monkeypatch.chdir(shared_config)
+
+    bob_token = make_token("bob", CONFIG)
 
-    client = TestClient(app)
+    async with AsyncExitStack() as stack:
+        ws1 = await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=alice_token)
+        )
+        ws2 = await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=bob_token)
+        )
 
-    with client.websocket_connect(
-        f"/channel/chat?token={token1}"
-    ) as ws1, client.websocket_connect(f"/channel/chat?token={token2}") as ws2:
         # Alice sends a message.
-        ws1.send_text("Hello from Alice!")
+        await ws1.send_text("Hello from Alice!")
 
         # Bob should receive it.
-        message = ws2.receive_text()
+        message = await ws2.receive_text()
         assert message == "Hello from Alice!"
 
         # Bob sends a message.
-        ws2.send_text("Hi Alice!")
+        await ws2.send_text("Hi Alice!")
 
         # Alice should receive it.
-        message = ws1.receive_text()
+        message = await ws1.receive_text()
         assert message == "Hi Alice!"
 
 
-def test_websocket_channel_isolation(tmp_path, monkeypatch, clear_channels):
+@pytest.mark.xdist_group("websocket")
+@pytest.mark.asyncio(loop_scope="module")
+async def test_websocket_endpoint_interns_channel_names(
+    shared_config, monkeypatch, channels, alice_token
+):
     """
-    Messages in one channel do not appear in other channels.
+    Connections to the same channel share one interned channel key.
     """
-    config_path = tmp_path / "config.json"
-    monkeypatch.chdir(tmp_path)
+    monkeypatch.chdir(shared_config)
 
-    config = {
-        "users": {},
-        "proxies": {},
-        "jwt": {"secret": "test_secret", "expiry_hours": 24},
-    }
+    async with AsyncExitStack() as stack:
+        await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=alice_token)
+        )
+        await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=alice_token)
+        )
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f)
+        (key,) = channels
+        assert key is sys.intern("chat")
+        assert len(channels["chat"]) == 2
 
-    token = create_jwt_token("alice", config)
 
-    client = TestClient(app)
+@pytest.mark.xdist_group("websocket")
+@pytest.mark.asyncio(loop_scope="module")
+async def test_websocket_channel_isolation(
+    shared_config, monkeypatch, channels, alice_token
+):
+    """
+    Messages in one channel do not appear in other channels.
+    """
+    monkeypatch.chdir(shared_config)
+
+    async with AsyncExitStack() as stack:
+        ws_chat = await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=alice_token)
+        )
+        ws_chat_peer = await stack.enter_async_context(
+            ASGIWebSocket("/channel/chat", token=alice_token)
+        )
+        ws_notifications = await stack.enter_async_context(
+            ASGIWebSocket("/channel/notifications", token=alice_token)
+        )
 
-    with client.websocket_connect(
-        f"/channel/chat?token={token}"
-    ) as ws_chat, client.websocket_connect(
-        f"/channel/notifications?token={token}"
-    ) as ws_notifications:
         # Send message to chat channel.
-        ws_chat.send_text("Chat message")
+        await ws_chat.send_text("Chat message")
 
-        # Notifications channel should not receive it.
-        # (We can't directly test non-receipt, but we verify isolation
-        # through the broadcast tests above)
+        # Once the chat peer has it, the broadcast is complete.
+        assert await ws_chat_peer.receive_text() == "Chat message"
 
-        # Send message to notifications channel.
-        ws_notifications.send_text("Notification message")
+        # Notifications channel should not have received it.
+        assert ws_notifications.from_app.empty()